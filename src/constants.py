@@ -7,3 +7,19 @@ ZOOM_MAX = 10
 
 THUMBNAIL_SIZE = QSize(70, 70)
 THUMBNAIL_PANEL_WIDTH = 200
+# Rendered thumbnails are kept in this directory of the platform's cache location between runs
+THUMBNAIL_CACHE_SUBDIR = "thumbnails"
+# Least recently used thumbnails are deleted beyond this many, about 10 MB
+THUMBNAIL_CACHE_MAX_FILES = 2000
+# PNG quality of cached thumbnails, Qt maps 80 to zlib level 1: fast, still compressed
+THUMBNAIL_CACHE_QUALITY = 80
+
+# Delay before the metadata filter runs after the last keystroke (ms)
+SEARCH_DEBOUNCE_MS = 150
+# Delay before the file dialog preview is rendered after the selection stops changing (ms)
+PREVIEW_DEBOUNCE_MS = 150
+
+# Size of Qt's pixmap cache, which keeps recently displayed images (KB)
+PIXMAP_CACHE_LIMIT_KB = 256 * 1024
+# Number of files on each side of the selection in its study that are prepared in advance
+PREFETCH_RADIUS = 3
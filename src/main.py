@@ -1,11 +1,16 @@
 import sys
 from PySide6.QtWidgets import QApplication
+from styles.theme import get_application_style
 from ui.main_window import DicomExplorer
 
 
 def main():
     app = QApplication(sys.argv)
+    # Names the application's directory in the platform's cache location
+    app.setApplicationName("dicom-metadata-explorer")
     app.setStyle("Fusion")
+    # Set once for the whole application so dialogs don't need their own copy
+    app.setStyleSheet(get_application_style())
     window = DicomExplorer()
     window.show()
     sys.exit(app.exec())
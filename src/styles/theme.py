@@ -19,24 +19,24 @@ def get_application_style():
             font-size: 14px;
         }}
 
-        /* Tree widget styling */
-        QTreeWidget {{
+        /* Tree view styling */
+        QTreeView {{
             border: 1px solid {VERTICAL_LINE_COLOR};
             border-radius: 4px;
             background-color: #2d2d2d;
         }}
-        QTreeWidget::item {{
+        QTreeView::item {{
             padding: 6px;
             color: {TEXT_COLOR};
         }}
-        QTreeWidget::item:hover {{
+        QTreeView::item:hover {{
             background-color: #3a3a3a;
         }}
-        QTreeWidget::item:selected {{
+        QTreeView::item:selected {{
             background-color: {ACCENT_COLOR};
             color: {TEXT_COLOR};
         }}
-        QTreeWidget::item:alternate {{
+        QTreeView::item:alternate {{
             background-color: #333333;
         }}
 
@@ -2,17 +2,18 @@ from PySide6.QtWidgets import QDialog, QDialogButtonBox, QFormLayout, QLabel, QL
 
 
 class EditTagDialog(QDialog):
-    def __init__(self, tag_item, parent=None):
+    def __init__(self, tag_row, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Edit DICOM Tag")
-        self.tag_item = tag_item
+        self.tag_row = tag_row
+        tag, name, vr, value = tag_row
 
         layout = QFormLayout(self)
-        self.value_edit = QLineEdit(tag_item.text(3))
+        self.value_edit = QLineEdit(value)
 
-        layout.addRow("Tag:", QLabel(tag_item.text(0)))
-        layout.addRow("Name:", QLabel(tag_item.text(1)))
-        layout.addRow("VR:", QLabel(tag_item.text(2)))
+        layout.addRow("Tag:", QLabel(tag))
+        layout.addRow("Name:", QLabel(name))
+        layout.addRow("VR:", QLabel(vr))
         layout.addRow("Value:", self.value_edit)
 
         button_box = QDialogButtonBox(
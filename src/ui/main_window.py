@@ -1,8 +1,8 @@
+import os
 from pathlib import Path
 
-import pydicom
 import pydicom.config
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QThreadPool
 from PySide6.QtGui import QAction
 from PySide6.QtWidgets import (
     QGridLayout,
@@ -11,7 +11,6 @@ from PySide6.QtWidgets import (
     QLineEdit,
     QMainWindow,
     QMessageBox,
-    QPushButton,
     QScrollArea,
     QStatusBar,
     QTabWidget,
@@ -20,12 +19,14 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
-from constants import THUMBNAIL_PANEL_WIDTH
-from styles.theme import get_application_style
+from constants import PREFETCH_RADIUS, THUMBNAIL_PANEL_WIDTH
 from ui.managers.file_browser_manager import FileBrowserManager
 from ui.managers.thumbnail_manager import ThumbnailManager
 from ui.viewers.image_viewer import ImageViewer
 from ui.viewers.metadata_viewer import MetadataViewer
+from ui.workers.dicom_loader import DicomLoader
+from ui.workers.pixel_prefetcher import PixelPrefetcher
+from utils.dicom_io import load_pixel_data
 
 # Constants
 ERROR_MESSAGE_TEMPLATE = "Error: {}"
@@ -39,8 +40,14 @@ class DicomExplorer(QMainWindow):
         self.setWindowTitle("DICOM Explorer")
         self.datasets = {}  # Dictionary to store opened DICOM datasets
         self.current_file = None
+        self.image_file = None  # File currently rendered in the image viewer
         self.study_groups = {}  # Dictionary to group datasets by StudyInstanceUID
         self.last_used_directory = str(Path.home())
+        self.pending_loads = {}  # Loaders running in the thread pool, by file path
+        self.pending_prefetches = {}  # Prefetchers running in the thread pool, by file path
+        self.prefetch_generation = 0  # Increased on every selection to drop stale prefetches
+        self.pending_renders = {}  # Images being processed for the viewer, by generation
+        self.render_generation = 0  # Increased for every image to show, to drop stale results
 
         # Initialize FileBrowserManager
         self.file_browser_manager = FileBrowserManager(self)
@@ -100,12 +107,12 @@ class DicomExplorer(QMainWindow):
         self.zoom_label.hide()
 
         layout.addWidget(right_panel)
-        self.setStyleSheet(get_application_style())
 
     def setup_signal_slots(self):
         """Set up signal-slot connections."""
-        self.tab_widget.currentChanged.connect(self.update_status_bar)
+        self.tab_widget.currentChanged.connect(self.on_tab_changed)
         self.image_viewer.zoom_changed.connect(self.update_zoom_status)
+        self.metadata_viewer.dataset_modified.connect(self.on_dataset_modified)
 
         # Connect toolbar actions
         self.open_action.triggered.connect(self.browse_file)
@@ -135,13 +142,7 @@ class DicomExplorer(QMainWindow):
         thumbnail = self.sender()  # Get the clicked thumbnail button
         file_path = thumbnail.property("file_path")
 
-        # Deselect all thumbnails first
-        for i in range(self.thumbnail_layout.count()):
-            item = self.thumbnail_layout.itemAt(i)
-            if item and isinstance(item.widget(), QPushButton) and item.widget() != thumbnail:
-                item.widget().setChecked(False)
-
-        # Set the clicked thumbnail as selected
+        # Set the clicked thumbnail as selected, its button group deselects the others
         thumbnail.setChecked(True)
 
         # Load the selected DICOM file
@@ -152,19 +153,112 @@ class DicomExplorer(QMainWindow):
         if file_path in self.datasets:
             self.current_file = file_path
             self.update_display(self.datasets[file_path])
+            self.prefetch_neighbors(file_path)
+
+    def prefetch_neighbors(self, file_path):
+        """Prepare the images of the files next to the selected one in its study."""
+        self.prefetch_generation += 1
+        dataset = self.datasets[file_path]
+        study_uid = dataset.StudyInstanceUID if hasattr(dataset, "StudyInstanceUID") else "Unknown"
+        study = self.study_groups.get(study_uid, [])
+        index = next((i for i, (path, _) in enumerate(study) if path == file_path), 0)
+
+        for path, neighbor in study[max(0, index - PREFETCH_RADIUS):index + PREFETCH_RADIUS + 1]:
+            if path == file_path or path in self.pending_prefetches or self.image_viewer.is_cached(neighbor):
+                continue
+
+            prefetcher = PixelPrefetcher(path, neighbor, self.prefetch_generation, self.is_current_prefetch)
+            prefetcher.signals.finished.connect(self.on_pixels_prefetched)
+            self.pending_prefetches[path] = prefetcher
+            QThreadPool.globalInstance().start(prefetcher)
+
+    def is_current_prefetch(self, generation):
+        """Check whether a prefetch was started for the current selection."""
+        return generation == self.prefetch_generation
+
+    def on_pixels_prefetched(self, file_path, generation, pixels):
+        """Cache the image of a prefetched file if the selection is still around it."""
+        self.pending_prefetches.pop(file_path, None)
+        if pixels is None or not self.is_current_prefetch(generation) or file_path not in self.datasets:
+            return
+
+        try:
+            self.image_viewer.cache_pixels(self.datasets[file_path], pixels)
+        except ValueError as e:
+            print(f"Error caching prefetched image: {e}")
 
     def update_display(self, dataset):
         """Update the metadata and image display for the selected DICOM file."""
         self.file_path.setText(self.current_file)
-        self.metadata_viewer.load_metadata(dataset)
+        self.metadata_viewer.load_metadata(dataset, self.current_file)
+
+        # The image is only rendered once the Content tab is shown
+        if self.tab_widget.currentIndex() == 1:
+            self.update_image()
+
+        self.update_status_bar(self.tab_widget.currentIndex())
+
+    def update_image(self):
+        """Show the current file in the image viewer if it isn't shown yet.
+
+        Recently shown or prefetched images come from the pixmap cache, others
+        are processed in the thread pool and shown by on_image_rendered.
+        """
+        if self.image_file == self.current_file:
+            return
 
-        if hasattr(dataset, "pixel_array"):
+        self.image_file = self.current_file
+        self.render_generation += 1
+        dataset = self.datasets.get(self.current_file)
+        if dataset is None or "Rows" not in dataset:
+            self.image_viewer.clear()
+        elif self.image_viewer.is_cached(dataset):
             self.image_viewer.display_image(dataset)
         else:
+            renderer = PixelPrefetcher(
+                self.current_file, dataset, self.render_generation, self.is_current_render
+            )
+            renderer.signals.finished.connect(self.on_image_rendered)
+            self.pending_renders[self.render_generation] = renderer
+            # The previous file's image is not left on screen while this one is processed
+            self.image_viewer.show_placeholder("Loading…")
+            # Ahead of neighbor prefetches queued for the previous selection
+            QThreadPool.globalInstance().start(renderer, 1)
+
+    def is_current_render(self, generation):
+        """Check whether an image is still the one to show in the viewer."""
+        return generation == self.render_generation
+
+    def on_image_rendered(self, file_path, generation, pixels):
+        """Show an image processed in the thread pool unless another file was selected since."""
+        self.pending_renders.pop(generation, None)
+        if not self.is_current_render(generation):
+            return
+
+        dataset = self.datasets.get(file_path)
+        if pixels is None or dataset is None:
             self.image_viewer.clear()
+        else:
+            try:
+                self.image_viewer.display_pixels(dataset, pixels)
+            except ValueError as e:
+                print(f"Error displaying image: {e}")
+                self.image_viewer.clear()
 
         self.update_status_bar(self.tab_widget.currentIndex())
 
+    def on_dataset_modified(self, dataset):
+        """Drop the image of an edited dataset so it is rendered again when shown."""
+        self.image_viewer.uncache(dataset)
+        if self.datasets.get(self.image_file) is dataset:
+            self.image_file = None
+
+    def on_tab_changed(self, index):
+        """Render the image when switching to the Content tab and update the status bar."""
+        if index == 1:
+            self.update_image()
+        self.update_status_bar(index)
+
     def update_status_bar(self, index: int) -> None:
         """Update the status bar based on the active tab."""
         if not self.current_file or self.current_file not in self.datasets:
@@ -175,19 +269,21 @@ class DicomExplorer(QMainWindow):
         dataset = self.datasets[self.current_file]
 
         if index == 0:  # Metadata tab
-            tag_count = self.metadata_viewer.tree.topLevelItemCount()
+            tag_count = self.metadata_viewer.model.rowCount()
             self.status_bar.showMessage(f"Loaded {tag_count} DICOM tags")
             self.zoom_label.hide()
 
         elif index == 1:  # Content tab
-            if hasattr(dataset, "pixel_array"):
-                dimensions = dataset.pixel_array.shape
+            # Read the image size from the header, decoding the pixels is not needed for it
+            if self.image_viewer.image_item and "Rows" in dataset and "Columns" in dataset:
                 bits = getattr(dataset, "BitsStored", "unknown")
                 self.status_bar.showMessage(
-                    f"Dimensions: {dimensions[1]}x{dimensions[0]}, {bits} bits/pixel"
+                    f"Dimensions: {dataset.Columns}x{dataset.Rows}, {bits} bits/pixel"
                 )
                 self.zoom_label.show()
             else:
+                # Nothing is shown yet, don't leave the previous image's dimensions
+                self.status_bar.clearMessage()
                 self.zoom_label.hide()
 
     def update_zoom_status(self, relative_zoom):
@@ -223,7 +319,7 @@ class DicomExplorer(QMainWindow):
     def handle_dropped_files(self, files):
         """Process dropped files."""
         for file_path in files:
-            if Path(file_path).suffix.lower() == ".dcm":  # Check for DICOM files
+            if file_path.lower().endswith(".dcm"):  # Check for DICOM files
                 self.load_dicom(file_path)
             else:
                 QMessageBox.warning(self, "Invalid File", f"File {file_path} is not a valid DICOM file.")
@@ -233,37 +329,65 @@ class DicomExplorer(QMainWindow):
         self.file_browser_manager.browse_file()
 
     def load_dicom(self, file_path):
-        """Load a DICOM file and add it to the dataset."""
+        """Load a DICOM file in a worker thread and add it to the dataset."""
+        # The preview is only shown while no file is displayed yet
+        loader = DicomLoader(file_path, want_preview=not self.current_file)
+        loader.signals.preview.connect(self.on_dicom_preview)
+        loader.signals.finished.connect(self.on_dicom_loaded)
+        loader.signals.failed.connect(self.on_dicom_load_failed)
+        self.pending_loads[file_path] = loader
+
+        self.status_bar.showMessage(f"Loading {os.path.basename(file_path)}...")
+        QThreadPool.globalInstance().start(loader)
+
+    def on_dicom_preview(self, file_path, dataset):
+        """Show the preview tags of a file while nothing else is displayed."""
+        if not self.current_file:
+            self.file_path.setText(file_path)
+            self.metadata_viewer.load_preview(dataset)
+
+    def on_dicom_loaded(self, file_path, dataset, thumbnail):
+        """Add a DICOM dataset and its thumbnail image read by a worker thread."""
+        self.pending_loads.pop(file_path, None)
         try:
-            dataset = pydicom.dcmread(file_path)
-            if not dataset:
-                raise ValueError("No data found in DICOM file.")
-
+            if file_path in self.datasets:
+                # Opened again, the rows and image of the replaced dataset are not shown anymore
+                self.metadata_viewer.forget(file_path)
+                self.image_viewer.uncache(self.datasets[file_path])
+                if self.image_file == file_path:
+                    self.image_file = None
             self.datasets[file_path] = dataset
-            self.add_thumbnail(file_path, dataset)
+            self.add_thumbnail(file_path, dataset, thumbnail)
 
-            if not self.current_file:
+            if not self.current_file or self.current_file == file_path:
                 self.current_file = file_path
                 self.update_display(dataset)
 
             self.status_bar.showMessage(
-                f"Loaded {self.metadata_viewer.tree.topLevelItemCount()} DICOM tags"
+                f"Loaded {self.metadata_viewer.model.rowCount()} DICOM tags"
             )
         except Exception as e:
             self.show_error_message(f"Error loading file: {str(e)}")
 
-    def add_thumbnail(self, file_path, dataset):
+    def on_dicom_load_failed(self, file_path, message):
+        """Report a DICOM file that could not be read."""
+        self.pending_loads.pop(file_path, None)
+        if not self.current_file and self.file_path.text() == file_path:
+            # Drop the read-only preview rows of the file
+            self.file_path.clear()
+            self.metadata_viewer.clear()
+        self.show_error_message(f"Error loading file: {message}")
+
+    def add_thumbnail(self, file_path, dataset, thumbnail=None):
         """Add a thumbnail of the DICOM file to the left panel."""
         study_uid = dataset.StudyInstanceUID if hasattr(dataset, "StudyInstanceUID") else "Unknown"
 
         # Group datasets by StudyInstanceUID
-        if study_uid not in self.study_groups:
-            self.study_groups[study_uid] = []
+        self.study_groups.setdefault(study_uid, []).append((file_path, dataset))
+        self.thumbnail_manager.set_thumbnail_image(file_path, thumbnail)
 
-        self.study_groups[study_uid].append((file_path, dataset))
-
-        # Rebuild the thumbnail layout
-        self.thumbnail_manager.rebuild_thumbnail_layout()
+        # Add only the new thumbnail to its study section
+        self.thumbnail_manager.add_thumbnail(study_uid, file_path, dataset)
 
     def save_file(self):
         """Save the currently selected DICOM file."""
@@ -271,8 +395,12 @@ class DicomExplorer(QMainWindow):
             self.status_bar.showMessage("No DICOM file loaded")
             return
 
+        # Pixel data is loaded lazily, make sure it is written back as well
+        dataset = self.datasets[self.current_file]
+        load_pixel_data(dataset)
+
         # Use FileBrowserManager to handle the save dialog
-        self.file_browser_manager.save_file(self.datasets[self.current_file], self.current_file)
+        self.file_browser_manager.save_file(dataset, self.current_file)
 
     def show_error_message(self, message):
         """Show an error message in the status bar and a message box."""
@@ -2,12 +2,14 @@ from pathlib import Path
 from typing import List, Optional
 
 import pydicom
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QPixmap
 from PySide6.QtWidgets import QFileDialog, QLabel, QVBoxLayout, QWidget
 
-from ui.viewers.image_viewer import ImageViewer
+from constants import PREVIEW_DEBOUNCE_MS
 from utils.dicom_properties import DicomImageProperties
+from utils.image_conversion import create_qimage
+from utils.thumbnail_cache import load_cached_thumbnail
 
 
 class FileBrowserManager:
@@ -18,7 +20,7 @@ class FileBrowserManager:
     def __init__(self, parent):
         self.parent = parent
         self.last_used_directory = str(Path.home())
-        self.image_viewer = ImageViewer()
+        self.preview_path = None  # Path the pending preview will be rendered for
 
     def _setup_dialog(self, dialog: QFileDialog, title: str, file_mode: QFileDialog.FileMode,
         accept_mode: QFileDialog.AcceptMode) -> None:
@@ -52,6 +54,11 @@ class FileBrowserManager:
         preview_layout.addWidget(preview_label)
         return preview_widget, preview_label
 
+    def _queue_preview(self, preview_timer: QTimer, path: str) -> None:
+        """Restart the preview timer, so only the last selected file is read."""
+        self.preview_path = path
+        preview_timer.start()
+
     def _update_preview(self, preview_label: QLabel, path: str) -> None:
         """Update dicom file preview."""
         if not path or not path.lower().endswith(".dcm"):
@@ -59,14 +66,17 @@ class FileBrowserManager:
             return
 
         try:
-            dataset = pydicom.dcmread(path)
-            if not hasattr(dataset, "pixel_array"):
-                preview_label.setText("No image preview available.")
-                return
-
-            dicom_props = DicomImageProperties.from_dataset(dataset)
-            processed_pixels = dicom_props.get_processed_pixels()
-            image = self.image_viewer.create_qimage(processed_pixels)
+            # Files opened before show their cached thumbnail without being decoded again
+            image = load_cached_thumbnail(path)
+            if image is None:
+                dataset = pydicom.dcmread(path)
+                if "PixelData" not in dataset:
+                    preview_label.setText("No image preview available.")
+                    return
+
+                dicom_props = DicomImageProperties.from_dataset(dataset, max_size=self.PREVIEW_SIZE)
+                processed_pixels = dicom_props.get_processed_pixels()
+                image = create_qimage(processed_pixels)
 
             pixmap = QPixmap.fromImage(image)
             preview_label.setPixmap(pixmap.scaled(
@@ -87,7 +97,13 @@ class FileBrowserManager:
             # add preview
             preview_widget, preview_label = self._create_preview_widget()
             dialog.layout().addWidget(preview_widget, 0, 3, 4, 1)
-            dialog.currentChanged.connect(lambda path: self._update_preview(preview_label, path))
+
+            # Render the preview once the selection stops changing, not for every file passed over
+            preview_timer = QTimer(dialog)
+            preview_timer.setSingleShot(True)
+            preview_timer.setInterval(PREVIEW_DEBOUNCE_MS)
+            preview_timer.timeout.connect(lambda: self._update_preview(preview_label, self.preview_path))
+            dialog.currentChanged.connect(lambda path: self._queue_preview(preview_timer, path))
 
             if dialog.exec() == QFileDialog.Accepted:
                 file_names = dialog.selectedFiles()
@@ -1,12 +1,10 @@
-from pathlib import Path
+import os
 
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QPixmap
-from PySide6.QtWidgets import QFrame, QLabel, QPushButton
+from PySide6.QtWidgets import QButtonGroup, QFrame, QGridLayout, QLabel, QPushButton
 
 from constants import THUMBNAIL_SIZE
-from ui.viewers.image_viewer import ImageViewer
-from utils.dicom_properties import DicomImageProperties
 
 
 class ThumbnailManager:
@@ -16,32 +14,49 @@ class ThumbnailManager:
         self.main_window = thumbnail_panel.window()
         self.datasets = datasets
         self.study_groups = study_groups
-
-    def rebuild_thumbnail_layout(self):
-        """Rebuild the thumbnail layout based on grouped datasets."""
-        self.clear_thumbnail_layout()
-        self.add_study_groups_to_layout()
-
-    def clear_thumbnail_layout(self):
-        """Clear the existing thumbnail layout."""
-        while self.thumbnail_layout.count():
-            item = self.thumbnail_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-
-    def add_study_groups_to_layout(self):
-        """Add study groups to the thumbnail layout."""
-        row = 0
-
-        for study_uid, datasets in self.study_groups.items():
-            if row > 0:
-                separator = self.create_horizontal_separator()
-                self.thumbnail_layout.addWidget(separator, row, 0, 1, 2)
-                row += 1
-
-            self.add_study_label(study_uid, datasets[0][1], row)
-            row += 1
-            row = self.add_thumbnails_for_study(datasets, row)
+        self.thumbnail_pixmaps = {}  # Thumbnail images by file path, built once per file
+        self.study_grids = {}  # Thumbnail grid of each study section, by StudyInstanceUID
+        self.next_row = 0  # Row of thumbnail_layout where the next study section starts
+
+        # Only one thumbnail is checked at a time, the group unchecks the previous one
+        self.button_group = QButtonGroup(thumbnail_panel)
+        self.button_group.setExclusive(True)
+
+    def set_thumbnail_image(self, file_path, image):
+        """Keep the thumbnail image of a file rendered by the loader as a pixmap."""
+        if image is not None:
+            self.thumbnail_pixmaps[file_path] = QPixmap.fromImage(image)
+
+    def add_thumbnail(self, study_uid, file_path, dataset):
+        """Add a thumbnail to the section of its study, leaving the other thumbnails in place."""
+        study_grid = self.study_grids.get(study_uid)
+        if study_grid is None:
+            study_grid = self.add_study_section(study_uid, dataset)
+
+        index = study_grid.count()
+        thumbnail = self.create_thumbnail(file_path, dataset)
+        study_grid.addWidget(thumbnail, index // 2, index % 2)
+
+    def add_study_section(self, study_uid, dataset):
+        """Add the separator, date label and thumbnail grid of a new study."""
+        if self.study_grids:
+            separator = self.create_horizontal_separator()
+            self.thumbnail_layout.addWidget(separator, self.next_row, 0, 1, 2)
+            self.next_row += 1
+
+        self.add_study_label(study_uid, dataset, self.next_row)
+        self.next_row += 1
+
+        study_grid = QGridLayout()
+        study_grid.setContentsMargins(0, 0, 0, 0)
+        # Two equal columns, also for studies with a single thumbnail
+        study_grid.setColumnStretch(0, 1)
+        study_grid.setColumnStretch(1, 1)
+        self.thumbnail_layout.addLayout(study_grid, self.next_row, 0, 1, 2)
+        self.next_row += 1
+
+        self.study_grids[study_uid] = study_grid
+        return study_grid
 
     def add_study_label(self, study_uid, dataset, row):
         """Add a study label to the thumbnail layout."""
@@ -63,17 +78,6 @@ class ThumbnailManager:
                 return study_date
         return study_date
 
-    def add_thumbnails_for_study(self, datasets, row):
-        """Add thumbnails for each dataset in the study group."""
-        for idx, (file_path, dataset) in enumerate(datasets):
-            thumbnail = self.create_thumbnail(file_path, dataset)
-            self.thumbnail_layout.addWidget(thumbnail, row, idx % 2)
-            if idx % 2 == 1:
-                row += 1
-        if len(datasets) % 2 == 1:
-            row += 1
-        return row
-
     def create_horizontal_separator(self):
         """Create a horizontal separator line."""
         separator = QFrame()
@@ -86,25 +90,17 @@ class ThumbnailManager:
         """Create a thumbnail widget for a DICOM file."""
         thumbnail = QPushButton()
         thumbnail.setCheckable(True)  # Enable checkable state
+        self.button_group.addButton(thumbnail)
 
         # Store the file path as a property of the thumbnail
         thumbnail.setProperty("file_path", file_path)
 
-        if hasattr(dataset, "pixel_array"):
-            try:
-                dicom_props = DicomImageProperties.from_dataset(dataset)
-                image_viewer = ImageViewer()
-                processed_pixels = dicom_props.get_processed_pixels()
-                image = image_viewer.create_qimage(processed_pixels)
-                pixmap = QPixmap.fromImage(image)
-                pixmap = pixmap.scaled(THUMBNAIL_SIZE, Qt.KeepAspectRatio)
-                thumbnail.setIcon(QPixmap(pixmap))
-                thumbnail.setIconSize(THUMBNAIL_SIZE)
-            except ValueError as e:
-                print(f"Error creating thumbnail: {e}")
-                thumbnail.setText(Path(file_path).name)
+        pixmap = self.thumbnail_pixmaps.get(file_path)
+        if pixmap is not None:
+            thumbnail.setIcon(pixmap)
+            thumbnail.setIconSize(THUMBNAIL_SIZE)
         else:
-            thumbnail.setText(Path(file_path).name)
+            thumbnail.setText(os.path.basename(file_path))
 
         thumbnail.clicked.connect(self.main_window.on_thumbnail_clicked)
 
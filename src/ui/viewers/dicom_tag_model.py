@@ -0,0 +1,179 @@
+from PySide6.QtCore import QAbstractItemModel, QModelIndex, Qt
+
+from utils.dicom_properties import iter_sequence_items
+
+HEADER_LABELS = ["Tag", "Name", "VR", "Value"]
+# Lowercased row text, used by the search filter
+SEARCH_ROLE = Qt.UserRole
+SEARCH_SEPARATOR = "\x1f"
+# Values longer than this are shortened in the view, the full text is kept in FULL_VALUE_ROLE
+MAX_DISPLAY_LENGTH = 512
+FULL_VALUE_ROLE = Qt.UserRole + 1
+# (group, element) tuple of the row's tag
+TAG_ROLE = Qt.UserRole + 2
+
+_format_tag = "({:04x},{:04x})".format
+
+
+class TagNode:
+    """A single tag row in the metadata tree."""
+
+    __slots__ = (
+        "tag", "texts", "display_value", "search_text", "parent", "row", "children", "sequence",
+        "dataset"
+    )
+
+    def __init__(self, tag=None, name="", vr="", value_str="", sequence=None, dataset=None):
+        self.tag = tag
+        # Dataset or sequence item the element of the row belongs to
+        self.dataset = dataset
+        self.texts = (_format_tag(*tag) if tag else "", name, vr, "")
+        self.parent = None
+        self.row = 0
+        self.children = []
+        # Sequence whose rows are only built once the node is expanded or searched
+        self.sequence = sequence or None
+        self.set_value(value_str)
+
+    def set_value(self, value_str):
+        """Set the value of the row, shortening long values for display."""
+        self.texts = self.texts[:3] + (value_str,)
+        if len(value_str) > MAX_DISPLAY_LENGTH:
+            self.display_value = value_str[:MAX_DISPLAY_LENGTH - 3] + "..."
+        else:
+            self.display_value = value_str
+        self.search_text = SEARCH_SEPARATOR.join(self.texts).lower()
+
+    def append_child(self, node):
+        """Append a child row to this node."""
+        node.parent = self
+        node.row = len(self.children)
+        self.children.append(node)
+
+    def take_sequence_rows(self):
+        """Build the rows of the elements of the pending sequence and clear it."""
+        rows = [
+            TagNode(elem["tag"], elem["name"], elem["vr"], elem["value"], dataset=item["dataset"])
+            for item in iter_sequence_items(self.sequence)
+            for elem in item["elements"]
+        ]
+        self.sequence = None
+        return rows
+
+
+class DicomTagModel(QAbstractItemModel):
+    """Item model exposing a tree of TagNode rows to a view."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._root = TagNode()
+
+    def set_root(self, root):
+        """Replace all rows of the model with the children of a root node."""
+        self.beginResetModel()
+        self._root = root
+        self.endResetModel()
+
+    def fetch_all(self):
+        """Build the rows of all sequences that were not expanded yet, e.g. before searching."""
+        pending = [node for node in self._root.children if node.sequence is not None]
+        if not pending:
+            return
+
+        self.beginResetModel()
+        for node in pending:
+            for row in node.take_sequence_rows():
+                node.append_child(row)
+        self.endResetModel()
+
+    def node(self, index):
+        """Return the node for an index, or the root node for an invalid one."""
+        return index.internalPointer() if index.isValid() else self._root
+
+    def row_texts(self, index):
+        """Return the full column texts of the row containing the given index."""
+        return list(self.node(index).texts)
+
+    def set_value(self, index, value_str):
+        """Set the value of the row containing the given index."""
+        self.node(index).set_value(value_str)
+        self.dataChanged.emit(
+            index.siblingAtColumn(0), index.siblingAtColumn(len(HEADER_LABELS) - 1)
+        )
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        return self.createIndex(row, column, self.node(parent).children[row])
+
+    def parent(self, index=QModelIndex()):
+        if not index.isValid():
+            return QModelIndex()
+        parent_node = index.internalPointer().parent
+        if parent_node is None or parent_node is self._root:
+            return QModelIndex()
+        return self.createIndex(parent_node.row, 0, parent_node)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self.node(parent).children)
+
+    def hasChildren(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return False
+        node = self.node(parent)
+        return bool(node.children) or node.sequence is not None
+
+    def canFetchMore(self, parent):
+        return parent.isValid() and self.node(parent).sequence is not None
+
+    def fetchMore(self, parent):
+        node = self.node(parent)
+        if node.sequence is None:
+            return
+
+        rows = node.take_sequence_rows()
+        if not rows:
+            return
+        self.beginInsertRows(parent, 0, len(rows) - 1)
+        for row in rows:
+            node.append_child(row)
+        self.endInsertRows()
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(HEADER_LABELS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        node = index.internalPointer()
+        if role == Qt.DisplayRole:
+            if index.column() == 3:
+                return node.display_value
+            return node.texts[index.column()]
+        if role == SEARCH_ROLE:
+            return node.search_text
+        if role == TAG_ROLE:
+            return node.tag
+        if role == FULL_VALUE_ROLE:
+            return node.texts[3]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return HEADER_LABELS[section]
+        return None
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        parent_node = self.node(parent)
+        if row < 0 or row + count > len(parent_node.children):
+            return False
+
+        self.beginRemoveRows(parent, row, row + count - 1)
+        del parent_node.children[row:row + count]
+        for i in range(row, len(parent_node.children)):
+            parent_node.children[i].row = i
+        self.endRemoveRows()
+        return True
@@ -1,10 +1,11 @@
-import numpy as np
-from PySide6.QtCore import QRectF, QSize, Qt, Signal
-from PySide6.QtGui import QGuiApplication, QImage, QPixmap
+from PySide6.QtCore import QRectF, QSize, Qt, QTimer, Signal
+from PySide6.QtGui import QGuiApplication, QPalette, QPixmap, QPixmapCache
 from PySide6.QtWidgets import QGraphicsScene, QGraphicsView, QSizePolicy
 
-from constants import ZOOM_FACTOR, ZOOM_MAX, ZOOM_MIN
+from constants import PIXMAP_CACHE_LIMIT_KB, ZOOM_FACTOR, ZOOM_MAX, ZOOM_MIN
+from utils.dicom_io import has_pixel_data
 from utils.dicom_properties import DicomImageProperties
+from utils.image_conversion import create_qimage
 
 
 class ImageViewer(QGraphicsView):
@@ -19,6 +20,8 @@ class ImageViewer(QGraphicsView):
         super().__init__(parent)
         self.scene = QGraphicsScene(self)
         self.image_item = None
+        self.fitted_viewport_size = QSize()  # Viewport size the image was last fitted to
+        QPixmapCache.setCacheLimit(PIXMAP_CACHE_LIMIT_KB)
 
         # Initialize zoom variables and UI components
         self._init_zoom_variables()
@@ -32,6 +35,13 @@ class ImageViewer(QGraphicsView):
         self.current_zoom = 1.0
         self.base_scale = 1.0
 
+        # Wheel steps arriving within one event loop pass are applied as a single zoom
+        self.pending_zoom_factor = 1.0
+        self.zoom_timer = QTimer(self)
+        self.zoom_timer.setSingleShot(True)
+        self.zoom_timer.setInterval(0)
+        self.zoom_timer.timeout.connect(self._apply_pending_zoom)
+
     def _init_ui(self):
         """Initialize UI components and their settings."""
         self.setScene(self.scene)
@@ -65,66 +75,84 @@ class ImageViewer(QGraphicsView):
         """Display a DICOM image from the given dataset.
 
         Args:
-            dataset: DICOM dataset containing pixel_array
+            dataset: DICOM dataset containing PixelData
 
         """
-        if not self._validate_dataset(dataset):
+        # Cached images are shown without checking or reading the pixel data
+        if not self.is_cached(dataset) and not self._validate_dataset(dataset):
             return
 
         try:
-            image = self._process_dicom_image(dataset)
-            self._setup_image_display(image)
+            pixmap = self._get_pixmap(dataset)
+            self._setup_image_display(pixmap)
         except Exception as e:
             print(f"Error displaying image: {e}")
 
     def _validate_dataset(self, dataset):
         """Validate DICOM dataset."""
-        return hasattr(dataset, "pixel_array")
-
-    def _process_dicom_image(self, dataset):
-        """Process DICOM dataset into QImage."""
-        dicom_props = DicomImageProperties.from_dataset(dataset)
-        processed_pixels = dicom_props.get_processed_pixels()
-        return self.create_qimage(processed_pixels)
+        return has_pixel_data(dataset)
 
     @staticmethod
-    def create_qimage(pixel_array):
-        """Create QImage from normalized pixel array.
-
-        This method is used both internally and by other classes to convert
-        numpy arrays to QImage objects.
-
-        Args:
-            pixel_array: 2D numpy array with pixel values
-
-        Returns:
-            QImage: Created QImage object
-
-        Raises:
-            ValueError: If pixel_array is not a 2D numpy array
+    def _cache_key(dataset):
+        """Get the QPixmapCache key of a dataset's image, by the path of its file.
 
+        Unlike an id, a path is never reused by another image. The entry has to
+        be dropped with uncache when the file is read again.
         """
-        if not isinstance(pixel_array, np.ndarray) or len(pixel_array.shape) != 2:
-            raise ValueError("Invalid pixel array: Expected a 2D NumPy array")
+        return f"dicom_image_{dataset.filename}"
+
+    def _get_pixmap(self, dataset):
+        """Get the pixmap of a dataset, reusing it from QPixmapCache if it was shown recently."""
+        pixmap = QPixmapCache.find(self._cache_key(dataset))
+        if pixmap is None:
+            pixmap = QPixmap.fromImage(self._process_dicom_image(dataset))
+            QPixmapCache.insert(self._cache_key(dataset), pixmap)
+        return pixmap
+
+    def is_cached(self, dataset):
+        """Check whether the image of a dataset is in QPixmapCache."""
+        return QPixmapCache.find(self._cache_key(dataset)) is not None
+
+    def uncache(self, dataset):
+        """Drop the cached image of a dataset, e.g. after it was edited."""
+        QPixmapCache.remove(self._cache_key(dataset))
+
+    def cache_pixels(self, dataset, processed_pixels):
+        """Store pixels processed elsewhere as the cached image of a dataset."""
+        pixmap = QPixmap.fromImage(create_qimage(processed_pixels))
+        QPixmapCache.insert(self._cache_key(dataset), pixmap)
+
+    def display_pixels(self, dataset, processed_pixels):
+        """Cache and display the pixels of a dataset processed elsewhere."""
+        self.cache_pixels(dataset, processed_pixels)
+        self.display_image(dataset)
 
-        height, width = pixel_array.shape
-        return QImage(pixel_array.data, width, height, width, QImage.Format_Grayscale8)
+    def _process_dicom_image(self, dataset):
+        """Process DICOM dataset into QImage."""
+        dicom_props = DicomImageProperties.from_dataset(dataset)
+        processed_pixels = dicom_props.get_processed_pixels()
+        return create_qimage(processed_pixels)
 
-    def _setup_image_display(self, image):
+    def _setup_image_display(self, pixmap):
         """Set up display of new image."""
-        pixmap = QPixmap.fromImage(image)
         self._clear_and_set_image(pixmap)
         self._reset_view_state()
         self._update_scene_and_view(pixmap)
 
     def _clear_and_set_image(self, pixmap):
-        """Clear scene and set new image."""
-        self.scene.clear()
-        self.image_item = self.scene.addPixmap(pixmap)
+        """Set new image, reusing the existing pixmap item if there is one."""
+        if self.image_item:
+            self.image_item.setPixmap(pixmap)
+        else:
+            self.scene.clear()  # Drops a placeholder shown while the image was processed
+            self.image_item = self.scene.addPixmap(pixmap)
 
     def _reset_view_state(self):
         """Reset view state to default values."""
         self.current_zoom = 1.0
+        # Wheel steps still waiting for the zoom timer belong to the previous image
+        self.pending_zoom_factor = 1.0
+        self.zoom_timer.stop()
         self.setTransform(self.transform().scale(1, 1))
 
     def _update_scene_and_view(self, pixmap):
@@ -139,13 +167,19 @@ class ImageViewer(QGraphicsView):
             return
 
         scale = self._calculate_fit_scale()
+        if scale <= 0:
+            return
+
         self._apply_center_and_scale(scale)
         self._update_zoom_state(scale)
+        self.fitted_viewport_size = self.viewport().size()
 
     def _calculate_fit_scale(self):
         """Calculate scale factor to fit view."""
         viewport_rect = self.viewport().rect()
         scene_rect = self.scene.sceneRect()
+        if scene_rect.isEmpty():
+            return 0
         return min(viewport_rect.width() / scene_rect.width(),
                   viewport_rect.height() / scene_rect.height())
 
@@ -159,8 +193,19 @@ class ImageViewer(QGraphicsView):
         """Update zoom state."""
         self.base_scale = scale
         self.current_zoom = scale
+        self._update_transformation_mode()
         self.zoom_changed.emit(1.0)
 
+    def _update_transformation_mode(self):
+        """Filter the image when it is shrunk, so large images don't alias.
+
+        Enlarged images keep the unfiltered pixels, which are cheaper to paint.
+        """
+        if self.current_zoom < 1:
+            self.image_item.setTransformationMode(Qt.SmoothTransformation)
+        else:
+            self.image_item.setTransformationMode(Qt.FastTransformation)
+
     def wheelEvent(self, event):
         """Handle mouse wheel events for zooming.
 
@@ -170,31 +215,37 @@ class ImageViewer(QGraphicsView):
         if not self.image_item:
             return
 
-        zoom_factor = self._calculate_zoom_factor(event)
-        if self._is_zoom_in_limits(zoom_factor):
-            self._apply_zoom(zoom_factor)
+        self.pending_zoom_factor *= self._calculate_zoom_factor(event)
+        self.zoom_timer.start()
 
     def _calculate_zoom_factor(self, event):
-        """Calculate zoom factor based on wheel event."""
-        factor = self.zoom_factor if event.angleDelta().y() > 0 else 1 / self.zoom_factor
-        return self.current_zoom * factor
+        """Calculate the zoom step of a wheel event."""
+        return self.zoom_factor if event.angleDelta().y() > 0 else 1 / self.zoom_factor
 
-    def _is_zoom_in_limits(self, potential_zoom):
-        """Check if potential zoom is within allowed limits."""
-        relative_zoom = potential_zoom / self.base_scale
-        return self.min_zoom <= relative_zoom <= self.max_zoom
+    def _apply_pending_zoom(self):
+        """Apply the wheel steps collected since the last zoom, within the allowed limits."""
+        relative_zoom = self.current_zoom * self.pending_zoom_factor / self.base_scale
+        self.pending_zoom_factor = 1.0
+
+        relative_zoom = min(max(relative_zoom, self.min_zoom), self.max_zoom)
+        new_zoom = relative_zoom * self.base_scale
+        if self.image_item and new_zoom != self.current_zoom:
+            self._apply_zoom(new_zoom)
 
     def _apply_zoom(self, new_zoom):
         """Apply new zoom."""
         factor = new_zoom / self.current_zoom
         self.current_zoom = new_zoom
+        self._update_transformation_mode()
         self.scale(factor, factor)
         self.zoom_changed.emit(self.current_zoom / self.base_scale)
 
     def resizeEvent(self, event):
         """Handle widget resize events."""
         super().resizeEvent(event)
-        self.centerAndScaleImage()
+        # Resizes that leave the viewport as it was don't need the image refitted
+        if self.viewport().size() != self.fitted_viewport_size:
+            self.centerAndScaleImage()
 
     def clear(self):
         """Clear current image from viewer."""
@@ -203,3 +254,11 @@ class ImageViewer(QGraphicsView):
         self.current_zoom = 1.0
         self.base_scale = 1.0
         self.resetTransform()
+
+    def show_placeholder(self, text):
+        """Clear the viewer and show a line of text instead of an image."""
+        self.clear()
+        item = self.scene.addText(text)
+        item.setDefaultTextColor(self.palette().color(QPalette.Text))
+        self.scene.setSceneRect(item.boundingRect())
+        self.centerOn(item)
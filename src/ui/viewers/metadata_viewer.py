@@ -1,106 +1,129 @@
-from pydicom.sequence import Sequence
-from PySide6.QtCore import Qt
+from PySide6.QtCore import QSortFilterProxyModel, Qt, QTimer, Signal
 from PySide6.QtWidgets import (
+    QAbstractItemView,
     QDialog,
     QHeaderView,
     QLineEdit,
     QMenu,
     QMessageBox,
-    QTreeWidget,
-    QTreeWidgetItem,
+    QTreeView,
     QVBoxLayout,
     QWidget,
 )
 
+from constants import SEARCH_DEBOUNCE_MS
 from ui.dialogs import EditTagDialog
-from utils.dicom_properties import get_tag_value_str
+from ui.viewers.dicom_tag_model import SEARCH_ROLE, TAG_ROLE, DicomTagModel, TagNode
+from utils.dicom_properties import format_value, get_tag_name
+
+# Converters from the edited text to the value type of a VR, other VRs keep the text
+VALUE_CASTERS = {
+    'DS': float, 'FL': float, 'FD': float,
+    'IS': int, 'SL': int, 'SS': int, 'UL': int, 'US': int,
+}
 
 
 class MetadataViewer(QWidget):
+    dataset_modified = Signal(object)  # Emitted with the dataset after a tag is edited or deleted
+
     def __init__(self, parent=None):
         super().__init__(parent)
         layout = QVBoxLayout(self)
         self.dataset = None
+        self.filter_text = ""  # Search text the proxy is currently filtered by
+        self.tree_cache = {}  # Root node of each loaded file's rows, by file path
 
         # Search input
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search by tag name or value...")
         layout.addWidget(self.search_input)
 
-        # Tree widget for displaying metadata
-        self.tree = QTreeWidget()
-        self.tree.setHeaderLabels(["Tag", "Name", "VR", "Value"])
+        # Model holding the metadata, filtered through a proxy for searching
+        self.model = DicomTagModel(self)
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setFilterKeyColumn(0)
+        self.proxy.setFilterRole(SEARCH_ROLE)
+        self.proxy.setRecursiveFilteringEnabled(True)
+        self.proxy.setAutoAcceptChildRows(True)
+
+        # Tree view for displaying metadata
+        self.tree = QTreeView()
+        self.tree.setModel(self.proxy)
+        self.tree.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.tree.setUniformRowHeights(True)  # Rows are single line, skip per-row size hints
         self.tree.setContextMenuPolicy(Qt.CustomContextMenu)
         self.tree.customContextMenuRequested.connect(self.show_context_menu)
 
         # Connect double-click signal to edit_tag method
-        self.tree.itemDoubleClicked.connect(self.edit_tag)
+        self.tree.doubleClicked.connect(self.edit_tag)
 
         # Connect key event
         self.tree.keyPressEvent = self.handle_key_press
 
-        # Configure header resizing
+        # Columns are sized to their contents once per load instead of on every change
         header = self.tree.header()
-        for i in range(4):
-            header.setSectionResizeMode(i, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(QHeaderView.Interactive)
 
         layout.addWidget(self.tree)
-        self.search_input.textChanged.connect(self.filter_items)
+
+        # Only filter once typing pauses instead of on every keystroke
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self._filter_timer.timeout.connect(self._apply_filter)
+        self.search_input.textChanged.connect(self._filter_timer.start)
 
     def handle_key_press(self, event):
-        """Handle key press events in the tree widget."""
+        """Handle key press events in the tree view."""
         if event.key() == Qt.Key_Delete:
-            current_item = self.tree.currentItem()
-            if current_item:
-                self.delete_tag(current_item)
+            current_index = self.tree.currentIndex()
+            if current_index.isValid():
+                self.delete_tag(current_index)
         else:
             # Call the parent class's keyPressEvent for other keys
-            QTreeWidget.keyPressEvent(self.tree, event)
+            QTreeView.keyPressEvent(self.tree, event)
 
     def show_context_menu(self, position):
         """Show a context menu for editing and deleting tags."""
-        item = self.tree.itemAt(position)
-        if item:
+        index = self.tree.indexAt(position)
+        if index.isValid():
             menu = QMenu()
             edit_action = menu.addAction("Edit Tag")
             delete_action = menu.addAction("Delete Tag")
             action = menu.exec(self.tree.viewport().mapToGlobal(position))
 
             if action == edit_action:
-                self.edit_tag(item)
+                self.edit_tag(index)
             elif action == delete_action:
-                self.delete_tag(item)
+                self.delete_tag(index)
 
-    def delete_tag(self, item):
+    def delete_tag(self, index):
         """Delete the selected tag from the dataset."""
-        if not isinstance(item, QTreeWidgetItem):
+        if not index.isValid():
             return
 
-        tag_str = item.text(0)[1:-1]  # Remove parentheses
+        source_index = self.proxy.mapToSource(index)
+        tag_text, name = self.model.row_texts(source_index)[:2]
+        tag = source_index.data(TAG_ROLE)
+        dataset = self.model.node(source_index).dataset
         try:
-            group, element = map(lambda x: int(x, 16), tag_str.split(','))
-            tag = (group, element)
-
             # Show confirmation dialog
             reply = QMessageBox.question(
                 self,
                 'Confirm Deletion',
-                f'Are you sure you want to delete tag {item.text(0)} ({item.text(1)})?',
+                f'Are you sure you want to delete tag {tag_text} ({name})?',
                 QMessageBox.Yes | QMessageBox.No,
                 QMessageBox.No
             )
 
             if reply == QMessageBox.Yes:
-                # Attempt to delete the tag
-                self.find_and_delete_tag(self.dataset, tag)
+                # Delete the tag from the dataset or sequence item the row belongs to
+                del dataset[tag]
 
-                # Remove the item from the tree
-                parent = item.parent()
-                if parent:
-                    parent.removeChild(item)
-                else:
-                    index = self.tree.indexOfTopLevelItem(item)
-                    self.tree.takeTopLevelItem(index)
+                # Remove the row from the model
+                self.model.removeRow(source_index.row(), source_index.parent())
+                self.dataset_modified.emit(self.dataset)
 
                 if hasattr(self.window(), 'status_bar'):
                     self.window().status_bar.showMessage(
@@ -111,116 +134,120 @@ class MetadataViewer(QWidget):
             QMessageBox.warning(
                 self,
                 "Error",
-                f"Failed to delete tag {tag_str}: {str(e)}"
+                f"Failed to delete tag {tag_text}: {str(e)}"
             )
 
-    def find_and_delete_tag(self, dataset, tag):
-        """Recursively find and delete a tag in the dataset or its sequences."""
-        if tag in dataset:
-            del dataset[tag]
-            return True
-
-        # Check sequences
-        for element in dataset:
-            if isinstance(element.value, Sequence):
-                for sub_dataset in element.value:
-                    if self.find_and_delete_tag(sub_dataset, tag):
-                        return True
-        return False
-
-    def find_and_edit_tag(self, dataset, tag, new_value, vr):
-        """Recursively find and edit a tag in the dataset or its sequences."""
-        if tag in dataset:
-            # Update the tag based on VR
-            if vr in ['DS', 'FL', 'FD']:
-                dataset[tag].value = float(new_value)
-            elif vr in ['IS', 'SL', 'SS', 'UL', 'US']:
-                dataset[tag].value = int(new_value)
-            else:
-                dataset[tag].value = new_value
-
-        # Check if dataset contains sequences
-        for element in dataset:
-            if isinstance(element.value, Sequence):
-                for sub_dataset in element.value:
-                    self.find_and_edit_tag(sub_dataset, tag, new_value, vr)
-
-    def edit_tag(self, item):
+    def edit_tag(self, index):
         """Edit the selected tag."""
-        if isinstance(item, QTreeWidgetItem):  # Ensure the item is a QTreeWidgetItem
-            dialog = EditTagDialog(item, self)
-            if dialog.exec() == QDialog.Accepted:
-                try:
-                    tag_str = item.text(0)[1:-1]
-                    group, element = map(lambda x: int(x, 16), tag_str.split(','))
-                    tag = (group, element)
-
-                    # Retrieve VR from data_element or item text
-                    data_element = self.dataset.get(tag, None)
-                    if data_element:
-                        vr = data_element.VR if hasattr(data_element, 'VR') else item.text(2)
-                    else:
-                        vr = item.text(2)  # Fallback VR
-
-                    new_value = dialog.get_value()
-
-                    # Use the recursive function to find and edit the tag
-                    self.find_and_edit_tag(self.dataset, tag, new_value, vr)
-
-                    # Update the item display
-                    item.setText(3, str(new_value))
-
-                    if hasattr(self.window(), 'status_bar'):
-                        self.window().status_bar.showMessage(
-                            "Tag updated successfully", 3000
-                        )
-
-                except Exception as e:
-                    QMessageBox.warning(
-                        self, "Error", f"Failed to update tag {tag}: {str(e)}"
+        if not index.isValid():
+            return
+
+        source_index = self.proxy.mapToSource(index)
+        tag = source_index.data(TAG_ROLE)
+        dataset = self.model.node(source_index).dataset
+        row_texts = self.model.row_texts(source_index)
+        dialog = EditTagDialog(row_texts, self)
+        if dialog.exec() == QDialog.Accepted:
+            try:
+                # Retrieve VR from data_element or row text
+                data_element = dataset.get(tag, None)
+                if data_element:
+                    vr = data_element.VR if hasattr(data_element, 'VR') else source_index.siblingAtColumn(2).data()
+                else:
+                    vr = source_index.siblingAtColumn(2).data()  # Fallback VR
+
+                new_value = dialog.get_value()
+                if new_value == row_texts[3]:
+                    # Unchanged values are kept, the text of a multi-value doesn't convert back
+                    return
+
+                # Convert the value for the tag's VR
+                caster = VALUE_CASTERS.get(vr)
+                value = caster(new_value) if caster else new_value
+
+                # Edit the tag in the dataset or sequence item the row belongs to
+                dataset[tag].value = value
+
+                # Update the row display and its search key
+                self.model.set_value(source_index, str(new_value))
+                self.dataset_modified.emit(self.dataset)
+
+                if hasattr(self.window(), 'status_bar'):
+                    self.window().status_bar.showMessage(
+                        "Tag updated successfully", 3000
                     )
 
+            except Exception as e:
+                QMessageBox.warning(
+                    self, "Error", f"Failed to update tag {tag}: {str(e)}"
+                )
+
+    def _apply_filter(self):
+        """Apply the current search text once the debounce timer fires."""
+        self.filter_items(self.search_input.text())
+
     def filter_items(self, text):
-        """Filter tree items based on search text."""
+        """Filter tree rows based on search text."""
         text = text.lower()
-        for i in range(self.tree.topLevelItemCount()):
-            item = self.tree.topLevelItem(i)
-            matches = any(
-                text in item.text(j).lower() for j in range(item.columnCount())
-            )
-            item.setHidden(not matches)
+        if text == self.filter_text:
+            return
 
-    def create_sequence_tree(self, sequence_items, parent_item):
-        """Create a tree structure for DICOM sequences."""
-        try:
-            for item in sequence_items:
-                for elem in item['elements']:
-                    child = QTreeWidgetItem(parent_item)
-                    tag_str = f"({elem['tag'][0]:04x},{elem['tag'][1]:04x})"
-                    value_str = str(elem['value'][0]) if isinstance(elem['value'], tuple) else str(elem['value'])
-
-                    child.setText(0, tag_str)
-                    child.setText(1, elem['name'])
-                    child.setText(2, elem['vr'])
-                    child.setText(3, value_str)
-        except Exception as e:
-            print(f"Error in create_sequence_tree: {e}")
+        self.filter_text = text
+        if text:
+            # Rows inside sequences have to exist to be matched
+            self.model.fetch_all()
+        self.proxy.setFilterFixedString(text)
 
-    def load_metadata(self, dataset):
-        """Load DICOM metadata into the tree widget."""
-        self.tree.clear()
+    def load_preview(self, dataset):
+        """Show a partially read dataset read-only until the full one is loaded."""
+        self.load_metadata(dataset)
+        self.tree.setEnabled(False)
+
+    def load_metadata(self, dataset, file_path=None):
+        """Load DICOM metadata into the tree view.
+
+        The rows built for the dataset of a file are kept, so showing it again
+        only swaps them into the model. Edits and deletions update the kept rows
+        in place.
+        """
         self.dataset = dataset
+        self.tree.setEnabled(True)
+
+        root = self.tree_cache.get(file_path)
+        if root is None:
+            root = self.build_tree(dataset)
+            if file_path is not None:
+                self.tree_cache[file_path] = root
+
+        self.model.set_root(root)
+        if self.filter_text:
+            # Rows inside sequences have to exist to be matched
+            self.model.fetch_all()
+        self.tree.header().resizeSections(QHeaderView.ResizeToContents)
+
+    def forget(self, file_path):
+        """Drop the kept rows of a file, e.g. before it is loaded again."""
+        self.tree_cache.pop(file_path, None)
+
+    def clear(self):
+        """Remove all rows from the tree."""
+        self.dataset = None
+        self.tree.setEnabled(True)
+        self.model.set_root(TagNode())
 
+    def build_tree(self, dataset):
+        """Build the root node holding a row for each metadata element of a dataset."""
+        root = TagNode()
         for elem in dataset:
-            if elem.tag.group != 0x7FE0:  # Skip pixel data
-                item = QTreeWidgetItem()
-                tag_str = f"({elem.tag.group:04x},{elem.tag.element:04x})"
-                value_str, sequence_items = get_tag_value_str(elem)
-                item.setText(0, tag_str)
-                item.setText(1, elem.name or "")
-                item.setText(2, getattr(elem, "VR", ""))
-                item.setText(3, value_str)
-                self.tree.addTopLevelItem(item)
-
-                if sequence_items:
-                    self.create_sequence_tree(sequence_items, item)
+            tag = elem.tag
+            if tag.group == 0x7FE0:  # Skip pixel data
+                continue
+
+            # Sequence rows are built by the model when the row is first expanded
+            sequence = elem.value if elem.VR == "SQ" else None
+            root.append_child(TagNode(
+                (tag.group, tag.element), get_tag_name(elem), elem.VR, format_value(elem), sequence,
+                dataset
+            ))
+
+        return root
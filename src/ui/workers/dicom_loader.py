@@ -0,0 +1,79 @@
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from constants import THUMBNAIL_SIZE
+from utils.dicom_io import frame_count, read_dataset, read_metadata, read_preview
+from utils.dicom_properties import DicomImageProperties
+from utils.image_conversion import create_qimage
+from utils.thumbnail_cache import load_cached_thumbnail, save_cached_thumbnail
+
+
+class DicomLoaderSignals(QObject):
+    """Signals emitted by DicomLoader."""
+
+    preview = Signal(str, object)
+    finished = Signal(str, object, object)
+    failed = Signal(str, str)
+
+
+class DicomLoader(QRunnable):
+    """Read the metadata of a DICOM file and render its thumbnail image in a worker thread.
+
+    The metadata dataset leaves its pixel data on disk until something needs
+    to display it, single-frame thumbnails are rendered from a separate full read.
+    """
+
+    def __init__(self, file_path, want_preview=True):
+        super().__init__()
+        self.file_path = file_path
+        self.want_preview = want_preview  # Only read the preview tags if they can be shown
+        self.signals = DicomLoaderSignals()
+
+    def run(self):
+        """Read the file and emit the resulting dataset and thumbnail image."""
+        try:
+            if self.want_preview:
+                self.signals.preview.emit(self.file_path, read_preview(self.file_path))
+
+            dataset = read_metadata(self.file_path)
+            if not dataset:
+                raise ValueError("No data found in DICOM file.")
+
+            thumbnail = self.create_thumbnail_image(dataset)
+            self.signals.finished.emit(self.file_path, dataset, thumbnail)
+        except Exception as e:
+            self.signals.failed.emit(self.file_path, str(e))
+
+    def create_thumbnail_image(self, dataset):
+        """Return the thumbnail as a QImage scaled to THUMBNAIL_SIZE, or None.
+
+        QImage, unlike QPixmap, can be created outside the GUI thread, so only
+        the conversion to a pixmap is left to the thumbnail panel. Thumbnails
+        rendered in an earlier run or by the file dialog preview are read from
+        the cache instead.
+        """
+        # Files without an image module, like reports and RT plans, are not read again
+        if "Rows" not in dataset:
+            return None
+
+        try:
+            image = load_cached_thumbnail(self.file_path)
+            if image is None:
+                image = self.render_thumbnail_image(dataset)
+                if image is not None:
+                    image = save_cached_thumbnail(self.file_path, image)
+            return image
+        except Exception as e:
+            print(f"Error creating thumbnail: {e}")
+            return None
+
+    def render_thumbnail_image(self, dataset):
+        """Decode and process the pixels of the file into an image of about thumbnail size."""
+        # Multi-frame pixel data is decoded per frame from the file, see get_pixel_array
+        if frame_count(dataset) == 1:
+            dataset = read_dataset(self.file_path)
+            if "PixelData" not in dataset:
+                return None
+
+        max_size = max(THUMBNAIL_SIZE.width(), THUMBNAIL_SIZE.height())
+        dicom_props = DicomImageProperties.from_dataset(dataset, max_size=max_size)
+        return create_qimage(dicom_props.get_processed_pixels())
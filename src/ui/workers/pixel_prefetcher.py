@@ -0,0 +1,50 @@
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from utils.dicom_io import read_dataset
+from utils.dicom_properties import DicomImageProperties
+
+# Attributes that change how the pixels are displayed and can be edited in the metadata view
+DISPLAY_KEYWORDS = (
+    "PhotometricInterpretation", "WindowCenter", "WindowWidth", "RescaleSlope", "RescaleIntercept"
+)
+
+
+class PixelPrefetcherSignals(QObject):
+    """Signals emitted by PixelPrefetcher."""
+
+    finished = Signal(str, int, object)
+
+
+class PixelPrefetcher(QRunnable):
+    """Process the pixels of a DICOM file in a worker thread before it is displayed.
+
+    Only the pixels are read from disk, the display attributes are taken from the
+    loaded dataset so edits made to it are applied.
+    """
+
+    def __init__(self, file_path, dataset, generation, is_current):
+        super().__init__()
+        self.file_path = file_path
+        # Copied here in the GUI thread, the dataset can be edited while the worker runs
+        self.display_attributes = {keyword: dataset.get(keyword) for keyword in DISPLAY_KEYWORDS}
+        self.generation = generation
+        self.is_current = is_current  # Returns False once the selection has moved on
+        self.signals = PixelPrefetcherSignals()
+
+    def run(self):
+        """Read and process the pixels and emit them, or None if skipped or failed."""
+        pixels = None
+        try:
+            if self.is_current(self.generation):
+                dataset = read_dataset(self.file_path)
+                if "PixelData" in dataset:
+                    for keyword, value in self.display_attributes.items():
+                        if value is None:
+                            dataset.pop(keyword, None)
+                        else:
+                            setattr(dataset, keyword, value)
+                    pixels = DicomImageProperties.from_dataset(dataset).get_processed_pixels()
+        except Exception as e:
+            print(f"Error prefetching {self.file_path}: {e}")
+
+        self.signals.finished.emit(self.file_path, self.generation, pixels)
@@ -0,0 +1,100 @@
+import pydicom
+from pydicom.filereader import read_partial
+from pydicom.pixels import pixel_array
+from pydicom.tag import Tag
+
+# Values larger than this are read from disk only when accessed
+DEFER_SIZE = "1 KB"
+PIXEL_GROUP_START = 0x7FE00000
+# Tags shown while the full header of a file is still being read
+PREVIEW_TAGS = [
+    "PatientName",
+    "PatientID",
+    "Modality",
+    "StudyDate",
+    "StudyDescription",
+    "SeriesDescription",
+    "Rows",
+    "Columns",
+    "BitsAllocated",
+]
+PREVIEW_TAG_VALUES = [Tag(keyword) for keyword in PREVIEW_TAGS]
+# The preview tags all come before this group, parsing stops once it is reached
+PREVIEW_STOP_GROUP = 0x0029
+
+
+def read_preview(file_path):
+    """Read only the PREVIEW_TAGS of a DICOM file.
+
+    Parsing stops at the first element past the preview tags, so the rest of
+    the header is not read at all.
+    """
+    with open(file_path, "rb") as fileobj:
+        dataset = read_partial(
+            fileobj,
+            stop_when=lambda tag, vr, length: tag.group >= PREVIEW_STOP_GROUP,
+            specific_tags=PREVIEW_TAG_VALUES,
+        )
+    dataset.filename = file_path
+    return dataset
+
+
+def read_metadata(file_path):
+    """Read a DICOM file without its pixel data."""
+    return pydicom.dcmread(file_path, defer_size=DEFER_SIZE, stop_before_pixels=True)
+
+
+def read_dataset(file_path):
+    """Read a DICOM file including its pixel data."""
+    return pydicom.dcmread(file_path, defer_size=DEFER_SIZE)
+
+
+def load_pixel_data(dataset):
+    """Attach pixel data to a dataset read by read_metadata.
+
+    The pixel elements are read from the dataset's source file and merged into
+    the existing dataset, so any edits made to the metadata are preserved.
+    Returns True if the dataset holds pixel data afterwards.
+    """
+    if "PixelData" in dataset:
+        return True
+    if not dataset.filename:
+        return False
+
+    full_dataset = read_dataset(dataset.filename)
+    for tag in full_dataset.keys():
+        if tag >= PIXEL_GROUP_START and tag not in dataset:
+            dataset[tag] = full_dataset[tag]
+
+    return "PixelData" in dataset
+
+
+def has_pixel_data(dataset):
+    """Check whether pixels can be displayed for a dataset read by read_metadata.
+
+    Single-frame pixel data is merged in with load_pixel_data. Multi-frame
+    pixel data stays in the source file, get_pixel_array reads it per frame.
+    """
+    if frame_count(dataset) > 1 and dataset.filename:
+        return True
+    return load_pixel_data(dataset)
+
+
+def frame_count(dataset):
+    """Return the number of frames in a dataset."""
+    return int(dataset.get("NumberOfFrames") or 1)
+
+
+def get_pixel_array(dataset, frame=0):
+    """Decode the pixel array of a single frame of a dataset.
+
+    Multi-frame datasets read from a file decode the requested frame straight
+    from that file, so only its bytes are read instead of the whole PixelData.
+    The result is not cached on the dataset, so decoded pixels are only kept
+    by the caller.
+    """
+    if frame_count(dataset) > 1:
+        if dataset.filename:
+            return pixel_array(dataset.filename, index=frame)
+        return pixel_array(dataset, index=frame)
+    return pixel_array(dataset)
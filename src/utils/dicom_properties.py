@@ -1,43 +1,87 @@
 import numpy as np
 import pydicom
 import pydicom.dataset
+from pydicom.datadict import DicomDictionary
 from dataclasses import dataclass
 from typing import Optional, Union, Tuple, List, Dict, Any
 
+from utils.dicom_io import get_pixel_array
+
+# Images without a window are clipped to these percentiles before normalizing
+CLIP_PERCENTILES = (2, 98)
+# Larger images are strided down to about this many samples for the percentiles
+PERCENTILE_SAMPLE_SIZE = 1 << 20
+
 def normalize_pixel_array(pixel_array):
     """Normalize pixel array to uint8 range."""
-    if pixel_array.dtype != np.uint8:
-        return ((pixel_array - pixel_array.min()) /
-                (pixel_array.max() - pixel_array.min()) * 255).astype(np.uint8)
-    return pixel_array
-
-def get_tag_value_str(elem):
-    """Get string representation of DICOM element value."""
-    if isinstance(elem.value, bytes):
-        return "<binary data>", False
-    elif isinstance(elem.value, pydicom.sequence.Sequence):
-        sequence_items = get_sequence_items(elem.value)
-        return f"<sequence of {len(elem.value)} items>", sequence_items
-    return str(elem.value), False
-
-def get_sequence_items(sequence):
-    """Get items from a DICOM sequence."""
-    items = []
+    if pixel_array.dtype == np.uint8:
+        return pixel_array
+
+    # Work in a single float32 buffer to avoid float64 temporaries
+    low = float(pixel_array.min())
+    high = float(pixel_array.max())
+    scale = np.float32(255.0 / (high - low)) if high > low else np.float32(0.0)
+
+    # Values are bounded by [0, 255] after scaling, so no clip pass is needed
+    buffer = np.empty(pixel_array.shape, dtype=np.float32)
+    np.subtract(pixel_array, np.float32(low), out=buffer, dtype=np.float32)
+    np.multiply(buffer, scale, out=buffer)
+    return buffer.astype(np.uint8, copy=False)
+
+def downsample_pixel_array(pixel_array, max_size):
+    """Decimate a 2D pixel array by striding so its larger side is near max_size."""
+    if pixel_array.ndim != 2:
+        return pixel_array
+
+    step = max(pixel_array.shape) // max_size
+    if step <= 1:
+        return pixel_array
+    return np.ascontiguousarray(pixel_array[::step, ::step])
+
+def percentile_range(pixel_array, percentiles=CLIP_PERCENTILES):
+    """Get the pixel values at the given low/high percentiles."""
+    sample = pixel_array.ravel()
+    step = sample.size // PERCENTILE_SAMPLE_SIZE
+    if step > 1:
+        sample = sample[::step]
+    low, high = np.percentile(sample, percentiles)
+    return float(low), float(high)
+
+def get_tag_name(elem):
+    """Get the dictionary name of a DICOM element."""
+    # Standard tags are looked up directly, only private and repeater tags
+    # need pydicom's full name resolution
+    entry = DicomDictionary.get(elem.tag)
+    if entry is not None:
+        return entry[2]
+    return elem.name
+
+def format_value(elem):
+    """Get string representation of DICOM element value without walking sequences."""
+    if elem.VR == "SQ":
+        return f"<sequence of {len(elem.value)} items>"
+    value = elem.value
+    if isinstance(value, bytes):
+        return "<binary data>"
+    return str(value)
+
+def iter_sequence_items(sequence):
+    """Yield the items of a DICOM sequence, each with the display data of its elements.
+
+    The item's own dataset is included, so its elements can be edited in place.
+    """
     for i, item in enumerate(sequence):
-        sequence_item = {
-            "index": i,
-            "elements": []
-        }
+        elements = []
         for elem in item:
-            if elem.tag.group != 0x7FE0:
-                sequence_item["elements"].append({
-                    "tag": (elem.tag.group, elem.tag.element),
-                    "name": elem.name,
-                    "vr": getattr(elem, "VR", ""),
-                    "value": get_tag_value_str(elem)
+            tag = int(elem.tag)
+            if tag >> 16 != 0x7FE0:
+                elements.append({
+                    "tag": (tag >> 16, tag & 0xFFFF),
+                    "name": get_tag_name(elem),
+                    "vr": elem.VR,
+                    "value": format_value(elem)
                 })
-        items.append(sequence_item)
-    return items
+        yield {"index": i, "dataset": item, "elements": elements}
 
 @dataclass
 class DicomImageProperties:
@@ -53,10 +97,19 @@ class DicomImageProperties:
     bits_allocated: int = 8
 
     @classmethod
-    def from_dataset(cls, dataset: pydicom.dataset.Dataset) -> "DicomImageProperties":
-        """Create DicomImageProperties from a pydicom dataset."""
+    def from_dataset(cls, dataset: pydicom.dataset.Dataset,
+                     max_size: Optional[int] = None) -> "DicomImageProperties":
+        """Create DicomImageProperties from a pydicom dataset.
+
+        If max_size is given, the pixel array is decimated so that its larger
+        side is roughly max_size pixels before any further processing.
+        """
+        pixel_array = get_pixel_array(dataset)
+        if max_size:
+            pixel_array = downsample_pixel_array(pixel_array, max_size)
+
         props = cls(
-            pixel_array=dataset.pixel_array,
+            pixel_array=pixel_array,
             photometric_interpretation=getattr(dataset, "PhotometricInterpretation", "MONOCHROME2").strip().upper(),
             window_center=getattr(dataset, "WindowCenter", None),
             window_width=getattr(dataset, "WindowWidth", None),
@@ -76,22 +129,70 @@ class DicomImageProperties:
 
     def get_processed_pixels(self) -> np.ndarray:
         """Return processed pixel array with all DICOM properties applied."""
-        pixels = self.pixel_array.copy()
+        pixels = self.pixel_array
+        window = self.window_center is not None and self.window_width is not None
+        clip = not window and pixels.dtype != np.uint8
+
+        # 8-bit images with nothing to apply pass through without a copy
+        if not (self._has_transforms() or clip):
+            return normalize_pixel_array(pixels)
+
+        # Integer images of up to 16 bits go through a lookup table
+        if pixels.dtype.kind in "ui" and pixels.itemsize <= 2:
+            return self._process_with_lut(pixels, clip)
+
+        # Convert once to a float32 buffer and apply every step in place
+        return self._process_values(pixels.astype(np.float32), clip)
+
+    def _has_transforms(self) -> bool:
+        """Check whether rescale, inversion or windowing has to be applied."""
+        return (self.rescale_slope != 1.0 or self.rescale_intercept != 0.0
+                or self.photometric_interpretation == "MONOCHROME1"
+                or (self.window_center is not None and self.window_width is not None))
+
+    def _process_with_lut(self, pixels: np.ndarray, clip: bool) -> np.ndarray:
+        """Process integer pixels by looking them up in a table of processed values.
+
+        Every step maps a pixel value to a fixed output, so each possible value
+        is processed once and the image is a single gather from the result.
+        """
+        # The only full passes over the image besides the final lookup
+        low, high = int(pixels.min()), int(pixels.max())
+        if pixels.dtype.kind == "i":
+            # Flipping the sign bit maps signed values to table indices in order
+            offset = 1 << (pixels.itemsize * 8 - 1)
+            index = pixels.view(np.dtype(f"u{pixels.itemsize}")) ^ offset
+            values = np.arange(-offset, offset, dtype=np.float32)
+        else:
+            index = pixels
+            values = np.arange(high + 1, dtype=np.float32)
+
+        # Values not in the image must not change its range
+        np.clip(values, low, high, out=values)
+        if clip:
+            np.clip(values, *percentile_range(pixels), out=values)
+
+        return self._process_values(values, clip=False)[index]
 
+    def _process_values(self, pixels: np.ndarray, clip: bool) -> np.ndarray:
+        """Apply all DICOM properties in place to a float32 array and normalize it."""
         # Apply rescale
         if self.rescale_slope != 1.0 or self.rescale_intercept != 0.0:
-            pixels = pixels * self.rescale_slope + self.rescale_intercept
+            np.multiply(pixels, np.float32(self.rescale_slope), out=pixels)
+            np.add(pixels, np.float32(self.rescale_intercept), out=pixels)
 
         # Handle photometric interpretation
         if self.photometric_interpretation == "MONOCHROME1":
-            pixel_max = pixels.max()
-            pixels = pixel_max - pixels
+            np.subtract(pixels.max(), pixels, out=pixels)
 
         # Apply windowing if specified
         if self.window_center is not None and self.window_width is not None:
             min_value = self.window_center - self.window_width / 2
             max_value = self.window_center + self.window_width / 2
-            pixels = np.clip(pixels, min_value, max_value)
+            np.clip(pixels, min_value, max_value, out=pixels)
+        # Otherwise clip outliers so a few extreme pixels don't darken the image
+        elif clip:
+            np.clip(pixels, *percentile_range(pixels), out=pixels)
 
         # Normalize to 8-bit range using existing function
         return normalize_pixel_array(pixels)
@@ -0,0 +1,26 @@
+import numpy as np
+from PySide6.QtGui import QImage
+
+
+def create_qimage(pixel_array):
+    """Create QImage from normalized pixel array.
+
+    Unlike QPixmap, a QImage can be created outside the GUI thread, so this is
+    used by the image viewer as well as the workers.
+
+    Args:
+        pixel_array: 2D numpy array with pixel values
+
+    Returns:
+        QImage: Created QImage object
+
+    Raises:
+        ValueError: If pixel_array is not a 2D numpy array
+
+    """
+    if not isinstance(pixel_array, np.ndarray) or len(pixel_array.shape) != 2:
+        raise ValueError("Invalid pixel array: Expected a 2D NumPy array")
+
+    pixel_array = np.ascontiguousarray(pixel_array, dtype=np.uint8)
+    height, width = pixel_array.shape
+    return QImage(pixel_array.data, width, height, pixel_array.strides[0], QImage.Format_Grayscale8)
@@ -0,0 +1,74 @@
+import hashlib
+import os
+from pathlib import Path
+
+from PySide6.QtCore import QStandardPaths, Qt
+from PySide6.QtGui import QImage
+
+from constants import (
+    THUMBNAIL_CACHE_MAX_FILES,
+    THUMBNAIL_CACHE_QUALITY,
+    THUMBNAIL_CACHE_SUBDIR,
+    THUMBNAIL_SIZE,
+)
+
+
+def thumbnail_cache_dir():
+    """Return the directory rendered thumbnails are kept in."""
+    cache_location = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+    return Path(cache_location) / THUMBNAIL_CACHE_SUBDIR
+
+
+def thumbnail_cache_path(file_path):
+    """Return where the rendered thumbnail of a file is kept between runs.
+
+    The name is derived from the file's path, modification time and size, so
+    a file changed since its thumbnail was saved never reuses the old one.
+    """
+    stat = os.stat(file_path)
+    key = f"{os.path.abspath(file_path)}|{stat.st_mtime_ns}|{stat.st_size}"
+    return thumbnail_cache_dir() / f"{hashlib.sha1(key.encode()).hexdigest()}.png"
+
+
+def load_cached_thumbnail(file_path):
+    """Return the cached thumbnail image of a file, or None if there is none."""
+    cache_path = thumbnail_cache_path(file_path)
+    if not cache_path.exists():
+        return None
+
+    image = QImage(str(cache_path))
+    return None if image.isNull() else image
+
+
+def save_cached_thumbnail(file_path, image):
+    """Scale an image of a file to THUMBNAIL_SIZE and keep it as the file's thumbnail.
+
+    Returns the scaled image. Failing to write the cache only costs a later re-render.
+    """
+    image = image.scaled(THUMBNAIL_SIZE, Qt.KeepAspectRatio, Qt.FastTransformation)
+    try:
+        cache_path = thumbnail_cache_path(file_path)
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        image.save(str(cache_path), "PNG", THUMBNAIL_CACHE_QUALITY)
+        prune_thumbnail_cache(cache_path.parent)
+    except OSError as e:
+        print(f"Error caching thumbnail: {e}")
+    return image
+
+
+def prune_thumbnail_cache(cache_dir, max_files=THUMBNAIL_CACHE_MAX_FILES):
+    """Delete the least recently used thumbnails beyond max_files.
+
+    Thumbnails of files that were changed or deleted are never used again, so
+    they are the first to go.
+    """
+    entries = list(os.scandir(cache_dir))
+    if len(entries) <= max_files:
+        return
+
+    entries.sort(key=lambda entry: entry.stat().st_atime)
+    for entry in entries[:len(entries) - max_files]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass  # Already removed by another loader
@@ -0,0 +1,56 @@
+import os
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from pydicom.dataset import Dataset
+from PySide6.QtWidgets import QApplication, QDialog
+
+from ui.viewers.dicom_tag_model import FULL_VALUE_ROLE
+from ui.viewers.metadata_viewer import MetadataViewer
+
+app = QApplication.instance() or QApplication([])
+
+
+class AcceptingDialog:
+    """Stand-in for EditTagDialog that is accepted with the value it was filled with."""
+
+    def __init__(self, tag_row, parent=None):
+        self.value = tag_row[3]
+
+    def exec(self):
+        return QDialog.Accepted
+
+    def get_value(self):
+        return self.value
+
+
+class MetadataViewerTest(unittest.TestCase):
+    def setUp(self):
+        self.values = [f"VALUE{i}" for i in range(40)]
+        self.dataset = Dataset()
+        self.dataset.ImageType = self.values
+        self.viewer = MetadataViewer()
+        self.viewer.load_metadata(self.dataset)
+
+    def test_row_keeps_all_values(self):
+        value = self.viewer.model.index(0, 3).data(FULL_VALUE_ROLE)
+        self.assertIn(self.values[-1], value)
+
+        self.viewer.filter_items(self.values[-1])
+        self.assertEqual(self.viewer.proxy.rowCount(), 1)
+
+    def test_edit_keeps_all_values(self):
+        index = self.viewer.proxy.index(0, 0)
+        with mock.patch("ui.viewers.metadata_viewer.EditTagDialog", AcceptingDialog):
+            self.viewer.edit_tag(index)
+
+        self.assertEqual(list(self.dataset.ImageType), self.values)
+
+
+if __name__ == "__main__":
+    unittest.main()